@@ -5,21 +5,110 @@ date: 2024-11-14
 version: 1.0
 license: MIT
 description: Filter for academic paper search and context injection
-requirements: pymilvus, requests, pydantic, cachetools
+requirements: pymilvus, requests, pydantic, cachetools, numpy, orjson
 """
 
 import os
 import time
-from typing import List, Union, Generator, Iterator, Dict, Any, Optional
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import List, Union, Generator, Iterator, Dict, Any, Optional, Literal
 from pydantic import BaseModel, Field
+import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pymilvus import connections, Collection, utility
 import logging
-from cachetools import TTLCache
+import operator
+import re
+from cachetools import LRUCache, TTLCache
 from datetime import datetime
 
+
+@dataclass(slots=True)
+class Paper:
+    """A retrieved paper within the score threshold"""
+    source: str
+    abstract: str
+    key_points: str
+    score: float
+    timestamp: str
+
+
+class AsyncBatcher:
+    """Coalesce concurrent submissions into a single batched call"""
+
+    def __init__(self, flush_fn, max_batch: int = 32, max_wait_ms: float = 10):
+        self._flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next flush"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand the pending items to the flush function"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]):
+        """Resolve each waiting future with its share of the batch result"""
+        try:
+            results = await self._flush_fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
 class Pipeline:
     """Filter pipeline for academic paper search and context injection"""
+
+    # Only the fields rendered into the injected context are fetched from Milvus
+    SEARCH_FIELDS = ["source_file", "abstract", "key_points"]
+    # C-level accessor pulling all fetched fields of a hit in one call
+    _get_fields = operator.itemgetter(*SEARCH_FIELDS)
+    # Fixed scale mapping unit-norm float components onto int8
+    INT8_SCALE = 127.0
+    # Publication years named in a query, used to prefilter on the year field. Only
+    # year-like phrasing counts ("in 2023", "since 2020", "2023 papers"), so numbers
+    # such as "2048 tokens" are left alone
+    YEAR_PATTERN = re.compile(
+        r"\b(in|from|during|since|after|before)\s+((?:19|20)\d{2})\b"
+        r"|\b((?:19|20)\d{2})\s+(?:papers?|articles?|publications?|studies|research|work)\b",
+        re.IGNORECASE
+    )
+    # Conversational acknowledgements that never benefit from retrieval
+    SKIP_QUERIES = frozenset({"ok", "okay", "thanks", "thank you", "yes", "no", "sure", "great", "cool"})
+    SYSTEM_PROMPT = (
+        "You are a research assistant. Use these academic papers as context "
+        "for your response:\n\n"
+    )
     
     class Valves(BaseModel):
         """Configuration parameters for the filter"""
@@ -62,13 +151,64 @@ class Pipeline:
         # Search configuration
         top_k: int = Field(default=5, ge=1, le=20, description="Number of results to return")
         score_threshold: float = Field(default=2.0, description="Maximum distance threshold")
+        year_prefilter: bool = Field(
+            default=True, description="Restrict the search to years mentioned in the query (needs a year field)"
+        )
+        server_side_threshold: bool = Field(
+            default=False, description="Apply score_threshold in Milvus as a range search (ignored for GPU_* indexes)"
+        )
+
+        # Index tuning; for HNSW create the index with
+        # {"index_type": "HNSW", "metric_type": "L2", "params": {"M": 16, "efConstruction": 200}}
+        index_type: str = Field(default="GPU_CAGRA", description="Vector index type of the collection (GPU_CAGRA, IVF_FLAT, IVF_PQ, HNSW)")
+        nprobe: int = Field(default=16, ge=1, description="IVF clusters probed per query")
+        ef: int = Field(default=64, ge=1, description="HNSW candidate list size per query (must be >= top_k)")
+        search_width: int = Field(default=128, ge=1, description="CAGRA entry points explored per query")
+        warmup_search: bool = Field(default=True, description="Run one search at startup to load index pages before the first query")
+
+        # Query vector encoding. Each non-default type needs a matching embedding field:
+        # float16 -> FLOAT16_VECTOR (e.g. HNSW_SQ with sq_type SQ8), int8 -> INT8_VECTOR
+        # (HNSW, L2) and binary -> BINARY_VECTOR (BIN_IVF_FLAT, HAMMING), with stored
+        # vectors quantized the same way as the query
+        vector_dtype: Literal["float32", "float16", "int8", "binary"] = Field(
+            default="float32", description="Element type of the query vector sent to Milvus"
+        )
+        binary_threshold: int = Field(
+            default=1024, ge=0, description="Maximum Hamming distance when vector_dtype is binary"
+        )
         
+        retrieval_timeout_ms: float = Field(
+            default=0, ge=0,
+            description="Forward the request without context if retrieval takes longer (0 waits indefinitely)"
+        )
+        min_query_length: int = Field(
+            default=4, ge=0, description="Shortest message (in characters) that triggers a paper search"
+        )
+
         # Rate limiting
         requests_per_minute: int = Field(default=60, description="Maximum requests per minute")
         cache_ttl: int = Field(default=3600, description="Cache TTL in seconds")
+        semantic_cache_threshold: float = Field(
+            default=0.97, description="Cosine similarity above which cached results are reused"
+        )
+        semantic_cache_size: int = Field(default=256, description="Maximum semantically cached queries")
+
+        # Batching
+        embedding_batch_size: int = Field(default=32, ge=1, description="Maximum queries per embedding request")
+        embedding_batch_wait_ms: float = Field(
+            default=10, ge=0, description="Time to wait for concurrent queries before embedding"
+        )
+        embedding_max_concurrency: int = Field(
+            default=4, ge=1, description="Maximum embedding requests in flight at once"
+        )
+        embedding_pool_size: int = Field(
+            default=32, ge=1, description="Keep-alive connections held open to the embedding service"
+        )
 
         class Config:
             """Pydantic configuration"""
+            # Valves are replaced wholesale on update, never mutated in place
+            frozen = True
             json_schema_extra = {
                 "title": "Academic RAG Filter Configuration",
                 "description": "Settings for academic paper search and retrieval"
@@ -81,7 +221,15 @@ class Pipeline:
         self.valves = self.Valves()
         self._collection = None
         self._request_times = []
-        self._cache = TTLCache(maxsize=1000, ttl=self.valves.cache_ttl)
+        self._embed_cache = LRUCache(maxsize=1024)
+        self._embed_inflight = {}
+        self._http = self._create_session()
+        self._embed_batcher = AsyncBatcher(self._embed_batch)
+        # Concurrent searches share one Milvus request once their embeddings are ready
+        self._search_batcher = AsyncBatcher(self._search_batch)
+        # Searches left to finish after the retrieval budget ran out
+        self._background_tasks = set()
+        self._apply_valves()
         
         # Configure logging
         logging.basicConfig(
@@ -91,6 +239,20 @@ class Pipeline:
         self.logger = logging.getLogger(self.name)
         self.logger.info(f"Initialized {self.name}")
 
+    def _create_session(self) -> requests.Session:
+        """Create a pooled keep-alive session for the embedding service"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.valves.embedding_pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        self._http_pool_size = self.valves.embedding_pool_size
+        return session
+
     def _check_rate_limit(self) -> bool:
         """Check if within rate limit"""
         now = time.time()
@@ -103,108 +265,487 @@ class Pipeline:
 
     async def on_startup(self):
         """Server startup hook"""
+        # Valves restored from disk are assigned directly, without on_valves_updated
+        self._apply_valves()
         try:
-            # Initialize Milvus connection
-            connections.connect(
-                alias="default",
-                host=self.valves.milvus_host,
-                port=self.valves.milvus_port,
-                user=self.valves.milvus_user,
-                password=self.valves.milvus_password
-            )
+            # Initialize Milvus connection, reusing one already open in this process
+            if not connections.has_connection("default"):
+                connections.connect(
+                    alias="default",
+                    host=self.valves.milvus_host,
+                    port=self.valves.milvus_port,
+                    user=self.valves.milvus_user,
+                    password=self.valves.milvus_password,
+                    # Reconnect automatically when the gRPC channel drops to idle, so a later search does not fail
+                    keep_alive=True
+                )
             self._collection = Collection(self.valves.milvus_collection)
-            self._collection.load()
+            if utility.load_state(self.valves.milvus_collection).name != "Loaded":
+                self._collection.load()
+            if self.valves.warmup_search:
+                self._warmup()
+            self._preconnect()
             self.logger.info(f"Started {self.name}")
         except Exception as e:
             self.logger.error(f"Startup error: {str(e)}", exc_info=True)
             raise
 
+    async def on_valves_updated(self):
+        """Valves update hook"""
+        self._apply_valves()
+
+    def _apply_valves(self):
+        """Rebuild state derived from the valves"""
+        valves = self.valves
+        self._search_params = self._search_param()
+        if self._http_pool_size != valves.embedding_pool_size:
+            # In-flight requests keep their own connections; the old pool is dropped once idle
+            self._http = self._create_session()
+        for batcher in (self._embed_batcher, self._search_batcher):
+            batcher.max_batch = valves.embedding_batch_size
+            batcher.max_wait = valves.embedding_batch_wait_ms / 1000
+        self._embed_semaphore = asyncio.Semaphore(valves.embedding_max_concurrency)
+        # Cached results were produced under the old search settings
+        self._cache = TTLCache(maxsize=1000, ttl=valves.cache_ttl)
+        self._sem_cache_vecs = None
+        self._sem_cache_times = None
+        self._sem_cache_vals = []
+
+    def _preconnect(self):
+        """Open a pooled connection to the embedding service ahead of the first query"""
+        try:
+            self._http.head(self.valves.embedding_endpoint, timeout=(3.05, 5))
+        except requests.exceptions.RequestException as e:
+            self.logger.warning("Embedding service preconnect failed: %s", e)
+
+    def _warmup(self):
+        """Issue a throwaway search so the first real query does not pay for cold index pages"""
+        try:
+            dim = next(
+                field.params["dim"] for field in self._collection.schema.fields
+                if field.name == "embedding"
+            )
+            self._collection.search(
+                data=self._encode_queries([np.zeros(dim, dtype=np.float32)]),
+                anns_field="embedding",
+                param=self._search_params,
+                limit=1,
+                output_fields=[]
+            )
+        except Exception as e:
+            self.logger.warning("Warmup search failed: %s", e)
+
     async def on_shutdown(self):
         """Server shutdown hook"""
         try:
             if self._collection:
                 self._collection.release()
             connections.disconnect("default")
+            self._http.close()
             self.logger.info(f"Shut down {self.name}")
         except Exception as e:
             self.logger.error(f"Shutdown error: {str(e)}", exc_info=True)
 
-    def search_papers(self, query: str) -> Dict[str, Any]:
-        """Search for relevant papers using the query"""
-        # Check cache first
+    def _embed_key(self, query: str) -> tuple:
+        """Build the embedding cache key for a query"""
+        return (self.valves.embedding_model, " ".join(query.lower().split()))
+
+    def _fetch_embeddings(self, queries: List[str]) -> np.ndarray:
+        """Request embeddings for several queries in one call"""
+        valves = self.valves
+        response = self._http.post(
+            valves.embedding_endpoint,
+            data=orjson.dumps({
+                "input": queries,
+                "model": valves.embedding_model,
+                "input_type": "query",
+            }),
+            timeout=(3.05, 30)
+        )
+        response.raise_for_status()
+        data = sorted(orjson.loads(response.content)["data"], key=lambda item: item.get("index", 0))
+        if len(data) != len(queries):
+            raise ValueError(f"Embedding service returned {len(data)} vectors for {len(queries)} queries")
+        return np.asarray([item["embedding"] for item in data], dtype=np.float32)
+
+    async def _embed_batch(self, queries: List[str]) -> np.ndarray:
+        """Embed one batch off the event loop, bounded by the concurrency limit"""
+        async with self._embed_semaphore:
+            return await asyncio.to_thread(self._fetch_embeddings, queries)
+
+    def _split_cached(self, queries: List[str]) -> tuple:
+        """Return cache keys, cached vectors by key and the (key, query) pairs still to embed"""
+        keys = [self._embed_key(query) for query in queries]
+        embeddings = {}
+        missing = {}
+        for query, key in zip(queries, keys):
+            cached = self._embed_cache.get(key)
+            if cached is not None:
+                embeddings[key] = cached
+            else:
+                missing.setdefault(key, query)
+        return keys, embeddings, list(missing.items())
+
+    def get_embeddings(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed several queries, sending uncached text in batched requests"""
+        keys, embeddings, pending = self._split_cached(queries)
+        batch_size = self.valves.embedding_batch_size
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            vectors = self._fetch_embeddings([query for _, query in chunk])
+            for (key, _), embedding in zip(chunk, vectors):
+                embeddings[key] = self._embed_cache[key] = embedding
+        return [embeddings[key] for key in keys]
+
+    def get_embedding(self, query: str) -> np.ndarray:
+        """Embed a query, reusing the cached vector for repeated text"""
+        return self.get_embeddings([query])[0]
+
+    async def aget_embeddings(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed several queries, dispatching uncached batches concurrently"""
+        keys, embeddings, pending = self._split_cached(queries)
+        batch_size = self.valves.embedding_batch_size
+        chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        # Overlap the round trips of all batches; _embed_batch bounds how many are in flight
+        results = await asyncio.gather(
+            *(self._embed_batch([query for _, query in chunk]) for chunk in chunks)
+        )
+        for chunk, vectors in zip(chunks, results):
+            for (key, _), embedding in zip(chunk, vectors):
+                embeddings[key] = self._embed_cache[key] = embedding
+        return [embeddings[key] for key in keys]
+
+    async def aget_embedding(self, query: str) -> np.ndarray:
+        """Embed a query without blocking the event loop"""
+        key = self._embed_key(query)
+        embedding = self._embed_cache.get(key)
+        if embedding is not None:
+            return embedding
+
+        # Join a request already in flight for the same text (e.g. a concurrent inlet) instead of repeating it
+        pending = self._embed_inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._embed_batcher.submit(query))
+            self._embed_inflight[key] = pending
+            pending.add_done_callback(lambda _: self._embed_inflight.pop(key, None))
+        embedding = await asyncio.shield(pending)
+        self._embed_cache[key] = embedding
+        return embedding
+
+    def _semantic_lookup(self, q_norm: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Return cached results for a near-duplicate query, if any"""
+        if self._sem_cache_vecs is None or self._sem_cache_vecs.shape[1] != q_norm.shape[0]:
+            return None
+        sims = self._sem_cache_vecs @ q_norm
+        # Entries older than cache_ttl are stale, like their exact-cache counterparts
+        sims[self._sem_cache_times < time.monotonic() - self.valves.cache_ttl] = -np.inf
+        best = int(np.argmax(sims))
+        if sims[best] >= self.valves.semantic_cache_threshold:
+            return self._sem_cache_vals[best]
+        return None
+
+    def _semantic_store(self, q_norm: np.ndarray, result: Dict[str, Any]):
+        """Remember results for a query vector, evicting expired and the oldest entries"""
+        now = time.monotonic()
+        if self._sem_cache_vecs is None or self._sem_cache_vecs.shape[1] != q_norm.shape[0]:
+            self._sem_cache_vecs = q_norm[np.newaxis, :]
+            self._sem_cache_times = np.array([now])
+            self._sem_cache_vals = [result]
+            return
+        self._sem_cache_vecs = np.vstack((self._sem_cache_vecs, q_norm))
+        self._sem_cache_times = np.append(self._sem_cache_times, now)
+        self._sem_cache_vals.append(result)
+        # Entries are kept in insertion order, so expired ones form a prefix
+        expired = int(np.searchsorted(self._sem_cache_times, now - self.valves.cache_ttl))
+        drop = max(expired, len(self._sem_cache_vals) - self.valves.semantic_cache_size)
+        if drop > 0:
+            self._sem_cache_vecs = self._sem_cache_vecs[drop:]
+            self._sem_cache_times = self._sem_cache_times[drop:]
+            del self._sem_cache_vals[:drop]
+
+    def _precheck(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return a cached or rate-limited result, or None if a search is needed"""
         cache_key = f"search:{query}"
         if cache_key in self._cache:
-            self.logger.info("Returning cached results")
+            self.logger.debug("Returning cached results")
             return self._cache[cache_key]
 
-        # Check rate limit
         if not self._check_rate_limit():
             self.logger.warning("Rate limit exceeded")
             return {"success": False, "error": "Rate limit exceeded"}
+        return None
 
-        try:
-            # Get embedding
-            response = requests.post(
-                self.valves.embedding_endpoint,
-                headers={"Content-Type": "application/json"},
-                json={
-                    "input": [query],
-                    "model": self.valves.embedding_model,
-                    "input_type": "query",
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            embedding = response.json()["data"][0]["embedding"]
+    def _search_param(self) -> Dict[str, Any]:
+        """Build Milvus search parameters for the configured index type"""
+        valves = self.valves
+        index_type = valves.index_type.upper()
+        if index_type.startswith("HNSW"):
+            params = {"ef": max(valves.ef, valves.top_k)}
+        elif index_type == "GPU_CAGRA":
+            params = {"search_width": valves.search_width}
+        else:
+            params = {"nprobe": valves.nprobe}
+        # GPU indexes reject range search; hits are still thresholded client-side
+        if valves.server_side_threshold and not index_type.startswith("GPU_"):
+            # L2 and HAMMING range search keeps range_filter <= distance < radius
+            params.update(radius=self._distance_threshold(), range_filter=0.0)
+        metric = "HAMMING" if valves.vector_dtype == "binary" else "L2"
+        return {"metric_type": metric, "params": params}
 
-            # Search Milvus
-            results = self._collection.search(
-                data=[embedding],
-                anns_field="embedding",
-                param={"metric_type": "L2", "params": {"nprobe": 16}},
-                limit=self.valves.top_k,
-                output_fields=["source_file", "abstract", "key_points"]
-            )
+    def _distance_threshold(self) -> float:
+        """Return score_threshold expressed in the distance units of the query encoding"""
+        valves = self.valves
+        if valves.vector_dtype == "binary":
+            return valves.binary_threshold
+        if valves.vector_dtype == "int8":
+            # Milvus reports squared L2, so the distance grows with the square of the scale
+            return valves.score_threshold * self.INT8_SCALE ** 2
+        return valves.score_threshold
+
+    def _encode_queries(self, embeddings: List[np.ndarray]) -> List[Any]:
+        """Convert float32 query vectors to the configured wire encoding"""
+        dtype = self.valves.vector_dtype
+        if dtype == "float16":
+            return [embedding.astype(np.float16) for embedding in embeddings]
+        if dtype == "int8":
+            # The model emits unit-norm vectors, so every component fits a fixed scale
+            return [
+                np.clip(np.rint(embedding * self.INT8_SCALE), -127, 127).astype(np.int8)
+                for embedding in embeddings
+            ]
+        if dtype == "binary":
+            return [np.packbits(embedding > 0).tobytes() for embedding in embeddings]
+        return embeddings
+
+    def _extract_filter(self, query: str) -> Optional[str]:
+        """Build a Milvus boolean expression from years named in the query"""
+        if not self.valves.year_prefilter:
+            return None
+        current_year = datetime.now().year
+        years, since, until = set(), None, None
+        for preposition, year, noun_year in self.YEAR_PATTERN.findall(query):
+            value = int(year or noun_year)
+            if value > current_year:
+                continue
+            preposition = preposition.lower()
+            if preposition in ("since", "after"):
+                start = value if preposition == "since" else value + 1
+                since = start if since is None else min(since, start)
+            elif preposition == "before":
+                until = value if until is None else max(until, value)
+            else:
+                years.add(value)
+
+        clauses = [f"year in {sorted(years)}"] if years else []
+        bounds = []
+        if since is not None:
+            bounds.append(f"year >= {since}")
+        if until is not None:
+            bounds.append(f"year < {until}")
+        if bounds:
+            clauses.append(" and ".join(bounds))
+        if not clauses:
+            return None
+        return " or ".join(f"({clause})" for clause in clauses) if len(clauses) > 1 else clauses[0]
 
-            # Process results
+    def _query_collection_many(self, embeddings: List[np.ndarray], expr: Optional[str] = None) -> List[List[Paper]]:
+        """Run one vector search for several queries and keep hits within the score threshold"""
+        valves = self.valves
+        threshold = self._distance_threshold()
+
+        # Milvus returns one hit list per query vector, in submission order; the
+        # expression is applied before the ANN search, shrinking the candidate set
+        results = self._collection.search(
+            data=self._encode_queries(embeddings),
+            anns_field="embedding",
+            param=self._search_params,
+            limit=valves.top_k,
+            expr=expr,
+            output_fields=self.SEARCH_FIELDS
+        )
+
+        get_fields = self._get_fields
+        retrieved = datetime.now().isoformat()
+        batch = []
+        for hits in results:
+            # Threshold all distances in one comparison and only touch surviving hits
+            distances = np.asarray(hits.distances, dtype=np.float64)
             papers = []
-            for hits in results:
-                for hit in hits:
-                    if hit.distance <= self.valves.score_threshold:
-                        papers.append({
-                            "source": getattr(hit.entity, "source_file", "Unknown"),
-                            "abstract": getattr(hit.entity, "abstract", "No abstract"),
-                            "key_points": getattr(hit.entity, "key_points", "No key points"),
-                            "score": float(hit.distance),
-                            "timestamp": datetime.now().isoformat()
-                        })
-
-            result = {"success": True, "papers": papers}
-            self._cache[cache_key] = result
+            for i in np.flatnonzero(distances <= threshold).tolist():
+                source, abstract, key_points = get_fields(hits[i].fields)
+                papers.append(Paper(
+                    source=source or "Unknown",
+                    abstract=abstract or "No abstract",
+                    key_points=key_points or "No key points",
+                    score=float(distances[i]),
+                    timestamp=retrieved
+                ))
+            batch.append(papers)
+        return batch
+
+    def _query_collection(self, embedding: np.ndarray, expr: Optional[str] = None) -> List[Paper]:
+        """Run the vector search for a single query"""
+        return self._query_collection_many([embedding], expr)[0]
+
+    async def _search_batch(self, items: List[tuple]) -> List[List[Paper]]:
+        """Flush handler for the search batcher; one Milvus call per distinct filter"""
+        groups = {}
+        for i, (_, expr) in enumerate(items):
+            groups.setdefault(expr, []).append(i)
+        batch = [None] * len(items)
+        for expr, indices in groups.items():
+            embeddings = [items[i][0] for i in indices]
+            results = await asyncio.to_thread(self._query_collection_many, embeddings, expr)
+            for i, papers in zip(indices, results):
+                batch[i] = papers
+        return batch
+
+    def _store_result(self, query: str, q_norm: np.ndarray, papers: List[Paper], expr: Optional[str]) -> Dict[str, Any]:
+        """Cache a successful search under both the exact and semantic caches"""
+        result = {"success": True, "papers": papers}
+        self._cache[f"search:{query}"] = result
+        if expr is None:
+            self._semantic_store(q_norm, result)
+        return result
+
+    def _semantic_hit(self, query: str, embedding: np.ndarray, expr: Optional[str]) -> tuple:
+        """Normalize the query vector and look it up in the semantic cache"""
+        q_norm = embedding / (np.linalg.norm(embedding) or 1.0)
+        # Near-identical wording can name different years, so filtered queries bypass it
+        cached = self._semantic_lookup(q_norm) if expr is None else None
+        if cached is not None:
+            # Not copied into the exact cache, which would restart its TTL
+            self.logger.debug("Returning semantically cached results")
+        return q_norm, cached
+
+    @staticmethod
+    def _as_dicts(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert the papers of a search result to plain dicts for external callers"""
+        if "papers" not in result:
+            return result
+        return {**result, "papers": [asdict(paper) for paper in result["papers"]]}
+
+    def search_papers(self, query: str) -> Dict[str, Any]:
+        """Search for relevant papers using the query"""
+        return self._as_dicts(self._search_papers(query))
+
+    async def asearch_papers(self, query: str) -> Dict[str, Any]:
+        """Search for relevant papers without blocking the event loop"""
+        return self._as_dicts(await self._asearch_papers(query))
+
+    def _search_papers(self, query: str) -> Dict[str, Any]:
+        """Search for relevant papers, returning Paper objects"""
+        result = self._precheck(query)
+        if result is not None:
             return result
 
+        try:
+            embedding = self.get_embedding(query)
+            expr = self._extract_filter(query)
+            q_norm, cached = self._semantic_hit(query, embedding, expr)
+            if cached is not None:
+                return cached
+
+            papers = self._query_collection(embedding, expr)
+            if expr is not None and not papers:
+                # The year filter may have misread the query; retry without it
+                expr = None
+                papers = self._query_collection(embedding)
+            return self._store_result(query, q_norm, papers, expr)
+
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"API request error: {str(e)}", exc_info=True)
+            self.logger.error("API request error: %s", e, exc_info=True)
             return {"success": False, "error": "Embedding service unavailable"}
         except Exception as e:
-            self.logger.error(f"Search error: {str(e)}", exc_info=True)
+            self.logger.error("Search error: %s", e, exc_info=True)
             return {"success": False, "error": str(e)}
 
+    async def _asearch_papers(self, query: str) -> Dict[str, Any]:
+        """Search for relevant papers, running blocking I/O off the event loop"""
+        result = self._precheck(query)
+        if result is not None:
+            return result
+
+        try:
+            embedding = await self.aget_embedding(query)
+            expr = self._extract_filter(query)
+            q_norm, cached = self._semantic_hit(query, embedding, expr)
+            if cached is not None:
+                return cached
+
+            papers = await self._search_batcher.submit((embedding, expr))
+            if expr is not None and not papers:
+                # The year filter may have misread the query; retry without it
+                expr = None
+                papers = await self._search_batcher.submit((embedding, None))
+            return self._store_result(query, q_norm, papers, expr)
+
+        except requests.exceptions.RequestException as e:
+            self.logger.error("API request error: %s", e, exc_info=True)
+            return {"success": False, "error": "Embedding service unavailable"}
+        except Exception as e:
+            self.logger.error("Search error: %s", e, exc_info=True)
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _format_context(papers: List[Paper]) -> str:
+        """Render papers into the context block with a single join"""
+        parts = []
+        for i, paper in enumerate(papers, 1):
+            parts.extend((
+                "Document ", str(i), ":\nSource: ", paper.source,
+                "\nAbstract: ", paper.abstract,
+                "\nKey Points: ", paper.key_points,
+                "\nRelevance: ", format(paper.score, ".2f"),
+                "\nRetrieved: ", paper.timestamp,
+                "\n---\n\n"
+            ))
+        if parts:
+            parts[-1] = "\n---"
+        return "".join(parts)
+
+    def _is_retrieval_query(self, query: Any) -> bool:
+        """Reject empty, very short and acknowledgement-only messages before any I/O"""
+        if not isinstance(query, str):
+            return False
+        normalized = " ".join(query.lower().split()).rstrip("!.")
+        return len(normalized) >= self.valves.min_query_length and normalized not in self.SKIP_QUERIES
+
+    async def _search_within_budget(self, query: str) -> Optional[Dict[str, Any]]:
+        """Search for papers, giving up after retrieval_timeout_ms so generation can start"""
+        timeout_ms = self.valves.retrieval_timeout_ms
+        if not timeout_ms:
+            return await self._asearch_papers(query)
+
+        task = asyncio.ensure_future(self._asearch_papers(query))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            # Let the search finish in the background so a retry or follow-up hits the cache
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            self.logger.warning("Retrieval exceeded %.0f ms, forwarding without context", timeout_ms)
+            return None
+
     async def inlet(self, body: Dict, user: Optional[Dict] = None) -> Dict:
         """Process incoming messages"""
         try:
-            # Skip if not a proper message body
-            if not isinstance(body, dict) or "messages" not in body:
+            # Skip title-generation probes and malformed bodies before any I/O
+            if not isinstance(body, dict) or body.get("title") or "messages" not in body:
                 return body
 
             # Get the last user message
             last_message = body["messages"][-1]["content"]
+            if not self._is_retrieval_query(last_message):
+                return body
             
             # Search for relevant papers
-            result = self.search_papers(last_message)
+            result = await self._search_within_budget(last_message)
+            if result is None:
+                return body
             
             if not result["success"]:
-                self.logger.error(f"Search failed: {result.get('error')}")
+                self.logger.error("Search failed: %s", result.get("error"))
                 return body
 
             papers = result["papers"]
@@ -212,31 +753,16 @@ class Pipeline:
                 return body
 
             # Format context
-            context = "\n\n".join([
-                f"Document {i+1}:\n"
-                f"Source: {paper['source']}\n"
-                f"Abstract: {paper['abstract']}\n"
-                f"Key Points: {paper['key_points']}\n"
-                f"Relevance: {paper['score']:.2f}\n"
-                f"Retrieved: {paper['timestamp']}\n"
-                "---"
-                for i, paper in enumerate(papers)
-            ])
+            context = self._format_context(papers)
 
             # Add context to system message
-            system_msg = {
-                "role": "system",
-                "content": (
-                    "You are a research assistant. Use these academic papers as context "
-                    f"for your response:\n\n{context}"
-                )
-            }
+            system_msg = {"role": "system", "content": self.SYSTEM_PROMPT + context}
             
             body["messages"].insert(0, system_msg)
             return body
 
         except Exception as e:
-            self.logger.error(f"Inlet error: {str(e)}", exc_info=True)
+            self.logger.error("Inlet error: %s", e, exc_info=True)
             return body
 
     async def outlet(self, response: str, user: Optional[Dict] = None) -> str:
@@ -5,7 +5,7 @@ date: 2024-01-20
 version: 1.2
 license: MIT
 description: A pipeline for text generation and image analysis using the Anthropic API.
-requirements: requests, sseclient-py
+requirements: requests, sseclient-py, orjson
 environment_variables: ANTHROPIC_API_KEY
 """
 
@@ -14,8 +14,14 @@ import requests
 import json
 from typing import List, Union, Generator, Iterator, Optional, Dict, Any
 from pydantic import BaseModel
+try:
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:  # optional speedup; fall back to the stdlib encoder/decoder
+    json_loads = json.loads
+    json_dumps = json.dumps
 import sseclient
 import logging
+from functools import lru_cache
 from urllib.parse import urlparse
 
 # Set up logging with detailed formatting
@@ -25,6 +31,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=256)
+def remote_image_size(url: str) -> int:
+    """Return the content-length of a remote image, remembered per URL."""
+    response = requests.head(url, allow_redirects=True)
+    return int(response.headers.get('content-length', 0))
+
+
 class Pipeline:
     class Valves(BaseModel):
         ANTHROPIC_API_KEY: str = ""
@@ -101,14 +115,13 @@ class Pipeline:
     def validate_image_size(self, image_data: str) -> bool:
         """Validate image size is within limits."""
         try:
-            # For base64 data, calculate approximate size
+            # For base64 data, derive the decoded size without copying the payload
             if image_data.startswith('data:image'):
-                _, b64_data = image_data.split(',', 1)
-                size = len(b64_data) * 3 / 4  # Approximate decoded size
+                b64_len = len(image_data) - image_data.index(',') - 1
+                size = b64_len * 3 // 4 - image_data.count('=', -2)
             else:
-                # For URLs, get content-length from headers
-                response = requests.head(image_data, allow_redirects=True)
-                size = int(response.headers.get('content-length', 0))
+                # For URLs, get content-length from headers (cached per URL)
+                size = remote_image_size(image_data)
             
             return size <= self.valves.MAX_IMAGE_SIZE
         except Exception as e:
@@ -268,7 +281,7 @@ class Pipeline:
             response = requests.post(
                 self.url,
                 headers=self.headers,
-                json=payload,
+                data=json_dumps(payload),
                 stream=True
             )
             response.raise_for_status()
@@ -276,14 +289,14 @@ class Pipeline:
             client = sseclient.SSEClient(response)
             for event in client.events():
                 try:
-                    data = json.loads(event.data)
+                    data = json_loads(event.data)
                     if data["type"] == "content_block_start":
                         yield data["content_block"]["text"]
                     elif data["type"] == "content_block_delta":
                         yield data["delta"]["text"]
                     elif data["type"] == "message_stop":
                         break
-                except json.JSONDecodeError:
+                except ValueError:
                     logger.error(f"Failed to parse JSON: {event.data}")
                 except KeyError as e:
                     logger.error(f"Unexpected data structure: {e}")
@@ -295,10 +308,10 @@ class Pipeline:
     def get_completion(self, payload: dict) -> str:
         """Handle non-streaming responses from Anthropic API."""
         try:
-            response = requests.post(self.url, headers=self.headers, json=payload)
+            response = requests.post(self.url, headers=self.headers, data=json_dumps(payload))
             response.raise_for_status()
             
-            result = response.json()
+            result = json_loads(response.content)
             return result["content"][0]["text"] if "content" in result and result["content"] else ""
             
         except requests.exceptions.RequestException as e:
@@ -5,20 +5,48 @@ date: 2024-06-20
 version: 1.4
 license: MIT
 description: A pipeline for generating text and processing images using the Anthropic API.
-requirements: requests, sseclient-py
+requirements: requests, orjson
 environment_variables: ANTHROPIC_API_KEY
 """
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from typing import List, Union, Generator, Iterator
 from pydantic import BaseModel
-import sseclient
+try:
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:  # optional speedup; the stdlib parser also accepts bytes
+    json_loads = json.loads
+    json_dumps = json.dumps
 
 from utils.pipelines.main import pop_system_message
 
 
+def _create_session() -> requests.Session:
+    """Create a pooled keep-alive session for the Anthropic API"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.1)
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared by every Pipeline instance so requests reuse warm TLS connections
+SESSION = _create_session()
+
+# Text carried by each streamed event type that produces output
+STREAM_TEXT = {
+    "content_block_start": lambda data: data["content_block"]["text"],
+    "content_block_delta": lambda data: data["delta"]["text"],
+}
+
+
 class Pipeline:
     class Valves(BaseModel):
         ANTHROPIC_API_KEY: str = ""
@@ -146,31 +174,35 @@ class Pipeline:
             return f"Error: {e}"
 
     def stream_response(self, payload: dict) -> Generator:
-        response = requests.post(self.url, headers=self.headers, json=payload, stream=True)
-
-        if response.status_code == 200:
-            client = sseclient.SSEClient(response)
-            for event in client.events():
+        with SESSION.post(self.url, headers=self.headers, data=json_dumps(payload), stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Error: {response.status_code} - {response.text}")
+
+            # Anthropic sends one JSON object per "data:" line; event names,
+            # comments and blank separators carry nothing we need
+            for line in response.iter_lines(chunk_size=8192):
+                if not line.startswith(b"data:"):
+                    continue
+                event_data = line[5:].lstrip()
+                data = None
                 try:
-                    data = json.loads(event.data)
-                    if data["type"] == "content_block_start":
-                        yield data["content_block"]["text"]
-                    elif data["type"] == "content_block_delta":
-                        yield data["delta"]["text"]
-                    elif data["type"] == "message_stop":
+                    data = json_loads(event_data)
+                    event_type = data["type"]
+                    if event_type == "message_stop":
                         break
-                except json.JSONDecodeError:
-                    print(f"Failed to parse JSON: {event.data}")
+                    extract = STREAM_TEXT.get(event_type)
+                    if extract is not None:
+                        yield extract(data)
+                except ValueError:
+                    print(f"Failed to parse JSON: {event_data}")
                 except KeyError as e:
                     print(f"Unexpected data structure: {e}")
                     print(f"Full data: {data}")
-        else:
-            raise Exception(f"Error: {response.status_code} - {response.text}")
 
     def get_completion(self, payload: dict) -> str:
-        response = requests.post(self.url, headers=self.headers, json=payload)
+        response = SESSION.post(self.url, headers=self.headers, data=json_dumps(payload))
         if response.status_code == 200:
-            res = response.json()
+            res = json_loads(response.content)
             return res["content"][0]["text"] if "content" in res and res["content"] else ""
         else:
             raise Exception(f"Error: {response.status_code} - {response.text}")
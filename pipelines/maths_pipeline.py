@@ -8,14 +8,261 @@ description: A sophisticated math expression solver that provides detailed step-
 requirements: pydantic
 """
 
-from typing import List, Union, Generator, Iterator, Dict, Any
+from typing import List, Union, Generator, Iterator, Dict, Any, Optional
 from pydantic import BaseModel
 import ast
 import operator
 import logging
 from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+from functools import lru_cache
 import re
 
+# Optional accelerators for Pipeline.pipe_batch
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+# Opcodes of a linearized (postfix) expression program
+LOAD_CONST, UNARY_OP, BINARY_OP, UNSUPPORTED = range(4)
+
+# Supported operations keyed by AST op type: (function, display symbol)
+BINARY_OPERATORS = {
+    ast.Add: (operator.add, '+'),
+    ast.Sub: (operator.sub, '-'),
+    ast.Mult: (operator.mul, '×'),
+    ast.Div: (operator.truediv, '÷'),
+    ast.Pow: (operator.pow, '^'),
+}
+UNARY_OPERATORS = {
+    ast.USub: (operator.neg, '-'),
+    ast.UAdd: (operator.pos, '+'),
+}
+
+# Characters a sanitized expression may contain, checked before any parsing
+WHITESPACE_PATTERN = re.compile(r'\s+')
+EXPRESSION_CHARS = re.compile(r'[0-9+\-*/.()\[\]{}]*')
+BATCH_EXPRESSION_CHARS = re.compile(r'[0-9+\-*/.()\[\]{}A-Za-z_]*')
+
+# A bare, optionally signed number literal, which needs no parsing at all
+NUMBER_PATTERN = re.compile(r'[-+]?(?:[1-9][0-9]*|0+|[0-9]*\.[0-9]+|[0-9]+\.[0-9]*)')
+
+# Tokens of plain arithmetic: a number literal or an operator/parenthesis
+TOKEN_PATTERN = re.compile(r"(\d+\.?\d*|\.\d+)|(\*\*|[-+*/()])")
+# Infix operators: (AST op type, precedence, right associative)
+INFIX_OPERATORS = {
+    '+': (ast.Add, 1, False),
+    '-': (ast.Sub, 1, False),
+    '*': (ast.Mult, 2, False),
+    '/': (ast.Div, 2, False),
+    '**': (ast.Pow, 4, True),
+}
+PREFIX_OPERATORS = {'+': ast.UAdd, '-': ast.USub}
+# Signs bind tighter than * and / but looser than ** on their right, as in Python
+PREFIX_PRECEDENCE = 3
+
+
+def parse_arithmetic(expression: str) -> Optional[tuple]:
+    """Shunting-yard parse of plain arithmetic into the same postfix program as the AST path
+
+    Returns None for anything outside that grammar, including syntax errors, so
+    the caller can fall back to ast.parse and report it exactly as before.
+    """
+    program = []
+    operators = []  # (opcode, op type, precedence), or None for an open parenthesis
+    expect_operand = True
+    position = 0
+    for match in TOKEN_PATTERN.finditer(expression):
+        if match.start() != position:
+            return None
+        position = match.end()
+        number, symbol = match.groups()
+        if expect_operand:
+            if number is not None:
+                if '.' in number:
+                    program.append((LOAD_CONST, float(number)))
+                elif number[0] == '0' and number.strip('0'):
+                    return None  # leading zeros are a syntax error in Python
+                else:
+                    program.append((LOAD_CONST, int(number)))
+                expect_operand = False
+            elif symbol == '(':
+                operators.append(None)
+            elif symbol in PREFIX_OPERATORS:
+                operators.append((UNARY_OP, PREFIX_OPERATORS[symbol], PREFIX_PRECEDENCE))
+            else:
+                return None
+        elif symbol == ')':
+            while operators and operators[-1] is not None:
+                program.append(operators.pop()[:2])
+            if not operators:
+                return None
+            operators.pop()
+        elif symbol in INFIX_OPERATORS:
+            op_type, precedence, right_associative = INFIX_OPERATORS[symbol]
+            while operators and operators[-1] is not None and (
+                    operators[-1][2] > precedence
+                    or operators[-1][2] == precedence and not right_associative):
+                program.append(operators.pop()[:2])
+            operators.append((BINARY_OP, op_type, precedence))
+            expect_operand = True
+        else:
+            return None
+
+    if expect_operand or position != len(expression):
+        return None
+    while operators:
+        entry = operators.pop()
+        if entry is None:
+            return None
+        program.append(entry[:2])
+    return tuple(program)
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> tuple:
+    """Parse a sanitized expression into a postfix program, reusing it for repeated input
+
+    Each instruction is an (opcode, argument) pair and operands always precede
+    their operator, so a single value stack evaluates the program without recursion.
+    Plain arithmetic goes through parse_arithmetic; anything else through ast.parse.
+    """
+    program = parse_arithmetic(expression)
+    if program is not None:
+        return program
+
+    tree = ast.parse(expression, mode='eval')
+    program = []
+    pending = [(tree.body, False)]
+    while pending:
+        node, expanded = pending.pop()
+        node_type = type(node)
+        if node_type is ast.BinOp and type(node.op) in BINARY_OPERATORS:
+            if expanded:
+                program.append((BINARY_OP, type(node.op)))
+            else:
+                pending.extend(((node, True), (node.right, False), (node.left, False)))
+        elif node_type is ast.UnaryOp and type(node.op) in UNARY_OPERATORS:
+            if expanded:
+                program.append((UNARY_OP, type(node.op)))
+            else:
+                pending.extend(((node, True), (node.operand, False)))
+        elif node_type is ast.Constant and type(node.value) in (int, float):
+            program.append((LOAD_CONST, node.value))
+        else:
+            program.append((UNSUPPORTED, None))
+    return tuple(program)
+
+
+def exact_div(left, right):
+    """Divide keeping integer and rational operands exact"""
+    if type(left) is float or type(right) is float:
+        return left / right
+    return Fraction(left) / right
+
+
+def exact_pow(base, exponent):
+    """Raise to a power, keeping negative integer powers of rationals exact"""
+    if type(base) is int and type(exponent) is int and exponent < 0:
+        return Fraction(base) ** exponent
+    return base ** exponent
+
+
+EXACT_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: exact_div,
+    ast.Pow: exact_pow,
+}
+EXACT_UNARY_OPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+@lru_cache(maxsize=1024)
+def fold_constants(expression: str, max_power: int):
+    """Reduce a constant expression to a single value once per sanitized source
+
+    Integer and rational intermediates stay exact (int or Fraction), so only the
+    final result is converted to float.
+    """
+    program = compile_expression(expression)
+    if any(opcode == UNSUPPORTED for opcode, _ in program):
+        raise ValueError("Unsupported operation in expression")
+
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    try:
+        for opcode, arg in program:
+            if opcode == LOAD_CONST:
+                push(arg)
+            elif opcode == BINARY_OP:
+                right = pop()
+                left = pop()
+                if arg is ast.Div and right == 0:
+                    raise ValueError("Division by zero")
+                if arg is ast.Pow:
+                    if right > max_power:
+                        raise ValueError(f"Power exceeds maximum allowed ({max_power})")
+                    if left == 0 and right < 0:
+                        raise ValueError("Division by zero")
+                push(EXACT_BINARY_OPS[arg](left, right))
+            else:
+                push(EXACT_UNARY_OPS[arg](pop()))
+        value = stack[-1]
+        return float(value) if type(value) is Fraction else value
+    except (OverflowError, ZeroDivisionError, ValueError) as e:
+        raise ValueError(f"Calculation error: {str(e)}")
+
+
+# AST nodes a batch expression may contain; anything else is rejected before compiling
+BATCH_NODE_TYPES = frozenset({
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd,
+})
+
+
+@lru_cache(maxsize=256)
+def compile_batch_function(expression: str, max_power: int) -> tuple:
+    """Compile an expression over free variables into an array function
+
+    Returns (variable_names, function). The function is jitted with numba when
+    it is installed and is otherwise a plain Python function that numpy applies
+    element-wise.
+    """
+    tree = ast.parse(expression, mode='eval')
+    names = set()
+    for node in ast.walk(tree):
+        node_type = type(node)
+        if node_type not in BATCH_NODE_TYPES:
+            raise ValueError("Unsupported operation in expression")
+        if node_type is ast.Name:
+            names.add(node.id)
+        elif node_type is ast.Constant and type(node.value) not in (int, float):
+            raise ValueError("Unsupported constant in expression")
+        elif node_type is ast.BinOp and type(node.op) is ast.Pow:
+            exponent = node.right
+            if not (type(exponent) is ast.Constant and type(exponent.value) in (int, float)
+                    and abs(exponent.value) <= max_power):
+                raise ValueError(f"Exponent must be a number no larger than {max_power}")
+
+    variables = tuple(sorted(names))
+    source = f"lambda {', '.join(variables)}: {ast.unparse(tree.body)}"
+    function = eval(compile(source, '<math>', 'eval'), {"__builtins__": {}})
+    if numba is not None:
+        function = numba.njit(fastmath=True)(function)
+    return variables, function
+
 class Pipeline:
     class Valves(BaseModel):
         """Configuration parameters for the math solver pipeline"""
@@ -26,6 +273,8 @@ class Pipeline:
         
     class MathNode:
         """Helper class for tracking mathematical operations"""
+        __slots__ = ('expression', 'value', 'operation')
+
         def __init__(self, expression: str, value: float, operation: str = None):
             self.expression = expression
             self.value = value
@@ -34,26 +283,19 @@ class Pipeline:
     def __init__(self):
         self.name = "Advanced Math Problem Solver"
         self.valves = self.Valves()
-        self.operators = {
-            ast.Add: (operator.add, '+'),
-            ast.Sub: (operator.sub, '-'),
-            ast.Mult: (operator.mul, '×'),
-            ast.Div: (operator.truediv, '÷'),
-            ast.Pow: (operator.pow, '^'),
-        }
         
     async def on_startup(self):
         """Initialize the pipeline"""
-        logging.info(f"Starting {self.name}")
+        logger.info("Starting %s", self.name)
         
     async def on_shutdown(self):
         """Cleanup pipeline resources"""
-        logging.info(f"Shutting down {self.name}")
+        logger.info("Shutting down %s", self.name)
 
-    def sanitize_expression(self, expression: str) -> str:
+    def sanitize_expression(self, expression: str, allow_variables: bool = False) -> str:
         """Clean and validate the mathematical expression"""
         # Remove whitespace and convert operators
-        expression = re.sub(r'\s+', '', expression)
+        expression = WHITESPACE_PATTERN.sub('', expression)
         expression = expression.replace('^', '**')
         
         # Basic validation
@@ -61,8 +303,8 @@ class Pipeline:
             raise ValueError(f"Expression too long (max {self.valves.MAX_EXPRESSION_LENGTH} characters)")
         
         # Check for invalid characters
-        valid_chars = set('0123456789+-*/.()[]{}') 
-        if not all(c in valid_chars for c in expression.replace('**', '')):
+        valid_chars = BATCH_EXPRESSION_CHARS if allow_variables else EXPRESSION_CHARS
+        if not valid_chars.fullmatch(expression):
             raise ValueError("Expression contains invalid characters")
             
         return expression
@@ -79,45 +321,61 @@ class Pipeline:
         except InvalidOperation:
             return str(number)
 
-    def evaluate_node(self, node: ast.AST, steps: List[str]) -> MathNode:
-        """Recursively evaluate AST nodes while tracking steps"""
-        if isinstance(node, ast.Num):
-            return self.MathNode(str(node.n), node.n)
+    def evaluate_program(self, program: tuple, steps: List[str]) -> MathNode:
+        """Evaluate a postfix program on an explicit value stack while tracking steps"""
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        # Resolve the node class and bound methods once rather than per instruction
+        math_node = self.MathNode
+        evaluate_binop = self.evaluate_binop
+        evaluate_unary = self.evaluate_unary
+        for opcode, arg in program:
+            if opcode == LOAD_CONST:
+                push(math_node(str(arg), arg))
+            elif opcode == BINARY_OP:
+                right = pop()
+                push(evaluate_binop(arg, pop(), right, steps))
+            elif opcode == UNARY_OP:
+                push(evaluate_unary(arg, pop()))
+            else:
+                raise ValueError("Unsupported operation in expression")
+        return stack[-1]
+
+    def evaluate_unary(self, op_type: type, operand: MathNode) -> MathNode:
+        """Apply a sign to an evaluated operand"""
+        op_func, op_symbol = UNARY_OPERATORS[op_type]
+        return self.MathNode(f"{op_symbol}{operand.expression}", op_func(operand.value), op_symbol)
+
+    def evaluate_binop(self, op_type: type, left: MathNode, right: MathNode, steps: List[str]) -> MathNode:
+        """Apply a binary operation to evaluated operands and record it as a solution step"""
+        op_func, op_symbol = BINARY_OPERATORS[op_type]
+        
+        # Perform operation
+        try:
+            if op_type is ast.Div and right.value == 0:
+                raise ValueError("Division by zero")
+                
+            if op_type is ast.Pow:
+                if right.value > self.valves.MAX_POWER:
+                    raise ValueError(f"Power exceeds maximum allowed ({self.valves.MAX_POWER})")
+                if left.value == 0 and right.value < 0:
+                    raise ValueError("Division by zero")
+                
+            result = op_func(left.value, right.value)
             
-        elif isinstance(node, ast.BinOp):
-            # Get operator information
-            op_func, op_symbol = self.operators[type(node.op)]
+            # Format the expression
+            expr = f"({left.expression} {op_symbol} {right.expression})"
             
-            # Evaluate left and right nodes
-            left = self.evaluate_node(node.left, steps)
-            right = self.evaluate_node(node.right, steps)
+            # Add step to solution
+            if self.valves.SHOW_STEPS:
+                formatted_result = self.format_number(result)
+                steps.append(f"{expr} = {formatted_result}")
             
-            # Perform operation
-            try:
-                if isinstance(node.op, ast.Div) and right.value == 0:
-                    raise ValueError("Division by zero")
-                    
-                if isinstance(node.op, ast.Pow):
-                    if right.value > self.valves.MAX_POWER:
-                        raise ValueError(f"Power exceeds maximum allowed ({self.valves.MAX_POWER})")
-                    
-                result = op_func(left.value, right.value)
-                
-                # Format the expression
-                expr = f"({left.expression} {op_symbol} {right.expression})"
-                
-                # Add step to solution
-                if self.valves.SHOW_STEPS:
-                    formatted_result = self.format_number(result)
-                    steps.append(f"{expr} = {formatted_result}")
-                
-                return self.MathNode(expr, result, op_symbol)
-                
-            except (OverflowError, ValueError) as e:
-                raise ValueError(f"Calculation error: {str(e)}")
-                
-        else:
-            raise ValueError("Unsupported operation in expression")
+            return self.MathNode(expr, result, op_symbol)
+            
+        except (OverflowError, ValueError) as e:
+            raise ValueError(f"Calculation error: {str(e)}")
 
     def solve_expression(self, expression: str) -> Dict[str, Any]:
         """Solve the mathematical expression and provide detailed solution"""
@@ -125,17 +383,22 @@ class Pipeline:
             # Sanitize and prepare expression
             clean_expr = self.sanitize_expression(expression)
             
-            # Parse expression
-            tree = ast.parse(clean_expr, mode='eval')
-            
             # Track solution steps
             steps = []
             
-            # Evaluate expression
-            result = self.evaluate_node(tree.body, steps)
+            # Evaluate expression; a bare number is converted directly, without steps
+            # to show an expression folds to one exact value
+            if NUMBER_PATTERN.fullmatch(clean_expr):
+                value = float(clean_expr) if '.' in clean_expr else int(clean_expr)
+            elif self.valves.SHOW_STEPS:
+                # Parse and linearize expression (cached per sanitized source)
+                program = compile_expression(clean_expr)
+                value = self.evaluate_program(program, steps).value
+            else:
+                value = fold_constants(clean_expr, self.valves.MAX_POWER)
             
             # Format output
-            formatted_result = self.format_number(result.value)
+            formatted_result = self.format_number(value)
             
             return {
                 'success': True,
@@ -151,13 +414,36 @@ class Pipeline:
                 'original': expression
             }
         except Exception as e:
-            logging.error(f"Unexpected error solving expression: {str(e)}")
+            logger.error("Unexpected error solving expression: %s", e)
             return {
                 'success': False,
                 'error': 'An unexpected error occurred',
                 'original': expression
             }
 
+    def pipe_batch(self, expression: str, xs):
+        """Evaluate an expression over arrays of variable values, e.g. sweeping x
+
+        With a single free variable xs is the array of its values; with several
+        it maps each variable name to its array.
+        """
+        clean_expr = self.sanitize_expression(expression, allow_variables=True)
+        variables, function = compile_batch_function(clean_expr, self.valves.MAX_POWER)
+        columns = [xs] if len(variables) == 1 else [xs[name] for name in variables]
+
+        if np is None:
+            # No numpy: evaluate element by element
+            if not variables:
+                return [function()] * len(xs)
+            return [function(*values) for values in zip(*columns)]
+
+        arrays = [np.asarray(column, dtype=np.float64) for column in columns]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = function(*arrays)
+        if not variables:
+            return np.full(np.shape(xs), result, dtype=np.float64)
+        return result
+
     def pipe(
         self,
         user_message: str,
@@ -29,10 +29,24 @@ class OpenWebUITest:
         console.print("\n[bold cyan]Starting OpenWebUI Simulation[/bold cyan]")
         await self.pipeline.on_startup()
 
+        # Collect one row per query and render the table once at the end
+        results = Table(title="Simulation Results", show_lines=True)
+        results.add_column("Query", style="yellow")
+        results.add_column("System Message Added", style="green")
+        results.add_column("Final Response Sent to User", style="blue")
+
         try:
+            # Embed every test query in one batched request; inlet then reuses the cached vectors
+            try:
+                await self.pipeline.aget_embeddings(self.test_queries)
+            except Exception as e:
+                logger.warning("Pre-embedding test queries failed, embedding per query instead: %s", e)
+
             # Process each query as a separate user interaction
             for query in self.test_queries:
-                console.print(f"\n[bold yellow]Processing query:[/bold yellow] {query}")
+                # Progress lines only help on a terminal; skip the markup work when output is piped
+                if console.is_terminal:
+                    console.print(f"\n[bold yellow]Processing query:[/bold yellow] {query}")
 
                 # Simulate a user message payload as received by OpenWebUI
                 body = {
@@ -44,20 +58,22 @@ class OpenWebUITest:
                 # Simulate the `inlet` step where the user's query is processed
                 processed_body = await self.pipeline.inlet(body)
 
-                # Display the modified system message added to the body
+                # Record the modified system message added to the body
                 system_message = processed_body["messages"][0]
-                console.print(f"\n[bold green]System Message Added:[/bold green] {system_message['content']}")
 
                 # Simulate generating an assistant response
                 assistant_response = "Here is my response based on the provided context."
 
                 # Simulate the `outlet` step where the assistant's response is processed
                 processed_response = await self.pipeline.outlet(assistant_response)
-                console.print(f"[bold blue]Final Response Sent to User:[/bold blue] {processed_response}")
+                results.add_row(query, system_message['content'], str(processed_response))
 
         except Exception as e:
             console.print(f"[red]Error during interaction simulation: {str(e)}[/red]", highlight=True)
         finally:
+            if results.row_count:
+                console.print(results)
+
             # Simulate OpenWebUI shutting down the pipeline
             await self.pipeline.on_shutdown()
             console.print("\n[bold cyan]Simulation Completed[/bold cyan]")
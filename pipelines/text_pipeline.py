@@ -46,6 +46,10 @@ class Pipeline:
     ) -> Union[str, Generator, Iterator]:
         """Main pipeline processing function"""
         
+        # Handle title request
+        if body.get("title", False):
+            return self.name
+
         # Log incoming message
         print(f"Processing message: {user_message}")
         
@@ -1,8 +1,24 @@
 from typing import List, Union, Generator, Iterator
-import subprocess
-import sys
+from functools import lru_cache
 import logging
 
+logger = logging.getLogger(__name__)
+
+try:
+    from art import FONT_NAMES, text2art
+except ImportError:
+    FONT_NAMES, text2art = (), None
+
+# Named fonts render deterministically; any other font ("random", "mix", "wizard", ...)
+# makes text2art pick a style per call, so its output must not be cached
+CACHEABLE_FONTS = frozenset(FONT_NAMES)
+
+
+@lru_cache(maxsize=256)
+def render_art(text: str, font: str) -> str:
+    """Render ASCII art once per (text, font) pair; rendering is deterministic"""
+    return text2art(text, font=font)
+
 
 class Pipeline:
     def __init__(self):
@@ -13,13 +29,15 @@ class Pipeline:
         """
         Lifecycle method called when the pipeline starts.
         """
-        logging.info(f"{self.name} is starting up...")
+        logger.info("%s is starting up...", self.name)
+        if text2art is None:
+            logger.warning("The 'art' package is not installed; ASCII art generation is unavailable")
 
     async def on_shutdown(self):
         """
         Lifecycle method called when the pipeline shuts down.
         """
-        logging.info(f"{self.name} is shutting down...")
+        logger.info("%s is shutting down...", self.name)
 
     def execute_art_command(self, text: str, font: str) -> Union[str, None]:
         """
@@ -32,34 +50,18 @@ class Pipeline:
         Returns:
             str: The ASCII art if successful, or an error message if not.
         """
+        if text2art is None:
+            return "Error generating ASCII art: the 'art' package is not installed"
+
         try:
-            # Dynamically generate the Python code
-            code = f"""
-from art import text2art
-try:
-    print(text2art("{text}", font="{font}"))
-except Exception as e:
-    print(f"Error: {{str(e)}}")
-"""
-            # Use the current Python executable to run the subprocess
-            result = subprocess.run(
-                [sys.executable, "-c", code],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-
-            # Check for "Error:" in the output
-            if "Error:" in result.stdout:
-                return result.stdout.strip()
-            return result.stdout.strip()
-
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Subprocess failed: {e}")
-            return f"Error generating ASCII art: {e.output.strip()}"
+            # text2art matches font names case-insensitively
+            font = font.lower()
+            if font in CACHEABLE_FONTS:
+                return render_art(text, font).strip()
+            return text2art(text, font=font).strip()
         except Exception as e:
-            logging.error(f"Unexpected error: {e}")
-            return f"Unexpected error: {e}"
+            logger.error("Unexpected error: %s", e)
+            return f"Error: {str(e)}"
 
     def pipe(
         self, user_message: str, model_id: str, messages: List[dict], body: dict
@@ -76,7 +78,11 @@ except Exception as e:
         Returns:
             str: The generated ASCII art or an error message.
         """
-        logging.info(f"Processing user message: {user_message}")
+        # Handle title request
+        if body.get("title", False):
+            return self.name
+
+        logger.info("Processing user message: %s", user_message)
 
         # Extract font from the body or use a default font
         font = body.get("font", "block")
@@ -85,7 +91,7 @@ except Exception as e:
 
         # Generate ASCII art
         ascii_art = self.execute_art_command(user_message.strip(), font)
-        logging.info(f"Generated ASCII Art: {ascii_art}")
+        logger.info("Generated ASCII Art: %s", ascii_art)
         return ascii_art or "Failed to generate ASCII art."
 
 
@@ -96,8 +102,11 @@ if __name__ == "__main__":
     # Initialize the pipeline
     pipeline = Pipeline()
 
+    # One event loop drives both lifecycle hooks
+    loop = asyncio.new_event_loop()
+
     # Run the startup process
-    asyncio.run(pipeline.on_startup())
+    loop.run_until_complete(pipeline.on_startup())
 
     # Simulate user input
     try:
@@ -107,4 +116,5 @@ if __name__ == "__main__":
         print(output)
     finally:
         # Ensure shutdown process runs
-        asyncio.run(pipeline.on_shutdown())
+        loop.run_until_complete(pipeline.on_shutdown())
+        loop.close()
@@ -7,8 +7,10 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.markdown import Markdown
 from rich.layout import Layout
+import io
 import json
 import logging
+import re
 
 from src.models.model import get_model_interface
 from src.models.embedding import embedding_client
@@ -18,7 +20,16 @@ from src.logs.logger import setup_logger
 logger = setup_logger(__name__)
 console = Console()
 
-@dataclass
+# Runs of a list separator and the whitespace around it, compiled once per separator
+_LIST_SPLITTERS = {
+    separator: re.compile(r"\s*(?:%s\s*)+" % re.escape(separator))
+    for separator in (",", ".", "\n")
+}
+
+# Four-digit publication year leading a paper file name, e.g. "2023-attention-is-all"
+_YEAR_PREFIX = re.compile(r"(\d{4})[\s\S]")
+
+@dataclass(slots=True)
 class Source:
     """Structured source information."""
     doc_id: int
@@ -135,7 +146,8 @@ class RAGEngine:
             sources = []
             
             for hit in results[0]:
-                file_name = getattr(hit, 'source_file', 'Unknown')
+                fields = hit.fields
+                file_name = fields.get('source_file', 'Unknown')
                 
                 # Skip duplicates based on filename
                 if file_name in seen_files:
@@ -144,17 +156,17 @@ class RAGEngine:
                 seen_files.add(file_name)
                 
                 source = Source(
-                    doc_id=getattr(hit, 'doc_id', -1),
+                    doc_id=fields.get('doc_id', -1),
                     file_name=file_name,
                     title=self.extract_paper_title(file_name),
-                    abstract=getattr(hit, 'abstract', 'No abstract available'),
-                    text=getattr(hit, 'text', ''),
-                    summary=getattr(hit, 'summary', ''),
-                    key_points=getattr(hit, 'key_points', ''),
-                    technical_terms=getattr(hit, 'technical_terms', ''),
-                    relationships=getattr(hit, 'relationships', ''),
-                    timestamp=getattr(hit, 'timestamp', 0),
-                    score=float(hit.distance)
+                    abstract=fields.get('abstract', 'No abstract available'),
+                    text=fields.get('text', ''),
+                    summary=fields.get('summary', ''),
+                    key_points=fields.get('key_points', ''),
+                    technical_terms=fields.get('technical_terms', ''),
+                    relationships=fields.get('relationships', ''),
+                    timestamp=fields.get('timestamp', 0),
+                    score=hit.distance
                 )
                 sources.append(source)
 
@@ -170,36 +182,45 @@ class RAGEngine:
 
     def format_context(self, sources: List[Source]) -> str:
         """Format sources into comprehensive context with structured sections."""
-        context_parts = []
+        # Stream every section into one buffer instead of building per-source strings
+        buf = io.StringIO()
+        write = buf.write
         for i, source in enumerate(sources, 1):
-            # Format technical terms as bullet points
-            tech_terms = self.format_list_items(source.technical_terms)
-            relationships = self.format_list_items(source.relationships, separator='.')
-            key_points = self.format_list_items(source.key_points, separator='\n')
-            
-            context_part = (
-                f"Source {i}: {source.title}\n\n"
-                f"Abstract:\n{source.abstract}\n\n"
-                f"Summary:\n{source.summary}\n\n"
-                f"Key Points:\n{key_points}\n\n"
-                f"Technical Terms:\n{tech_terms}\n\n"
-                f"Relationships:\n{relationships}\n\n"
-                f"Relevant Excerpt:\n{source.text[:2000]}\n\n"
-                f"Metadata:\n"
-                f"- Document ID: {source.doc_id}\n"
-                f"- Relevance Score: {source.score:.4f}\n"
-                f"- Processing Date: {datetime.fromtimestamp(source.timestamp).strftime('%Y-%m-%d %H:%M:%S')}\n"
-            )
-            context_parts.append(context_part)
+            write("\n\nSource ")
+            write(str(i))
+            write(": ")
+            write(source.title)
+            write("\n\nAbstract:\n")
+            write(source.abstract)
+            write("\n\nSummary:\n")
+            write(source.summary)
+            write("\n\nKey Points:\n")
+            write(self.format_list_items(source.key_points, separator='\n'))
+            write("\n\nTechnical Terms:\n")
+            write(self.format_list_items(source.technical_terms))
+            write("\n\nRelationships:\n")
+            write(self.format_list_items(source.relationships, separator='.'))
+            write("\n\nRelevant Excerpt:\n")
+            write(source.text[:2000])
+            write("\n\nMetadata:\n- Document ID: ")
+            write(str(source.doc_id))
+            write("\n- Relevance Score: ")
+            write(format(source.score, ".4f"))
+            write("\n- Processing Date: ")
+            write(datetime.fromtimestamp(source.timestamp).strftime('%Y-%m-%d %H:%M:%S'))
+            write("\n")
         
-        return "\n\n" + "\n\n".join(context_parts)
+        return buf.getvalue() or "\n\n"
 
     def format_list_items(self, text: str, separator: str = ',') -> str:
         """Format text into bullet points."""
         if not text:
             return "None provided"
-        items = [item.strip() for item in text.split(separator) if item.strip()]
-        return '\n'.join(f"• {item}" for item in items)
+        splitter = _LIST_SPLITTERS.get(separator)
+        if splitter is None:
+            splitter = re.compile(r"\s*(?:%s\s*)+" % re.escape(separator))
+        items = splitter.sub("\n• ", text.strip()).removeprefix("\n• ").removesuffix("\n• ")
+        return f"• {items}" if items else ""
 
     def display_result(self, result: RAGResult):
         """Enhanced display with comprehensive source information."""
@@ -306,8 +327,9 @@ class RAGEngine:
         clean_name = filename.replace('_embedded.json', '')
         year, title = None, clean_name
         
-        if len(clean_name) > 4 and clean_name[:4].isdigit():
-            year, title = clean_name[:4], clean_name[5:]
+        match = _YEAR_PREFIX.match(clean_name)
+        if match:
+            year, title = match.group(1), clean_name[5:]
             
         formatted_title = title.replace('-', ' ').strip()
         return f"{formatted_title} ({year})" if year else formatted_title
@@ -1,6 +1,12 @@
 from typing import List, Dict, Union, Optional
 import time
 import json
+from collections import OrderedDict
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib parser
+    orjson = None
+import numpy as np
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -25,6 +31,11 @@ class EmbeddingClient:
         self.max_batch_size = embedding_config.get('max_batch_size', 8000)
         self.timeout = 10  # Reduced timeout
         self.truncate = "START"
+
+        # LRU of recent embeddings keyed by (model, input_type, text)
+        caching_config = config._yaml_settings.get('caching', {})
+        self.cache_size = caching_config.get('max_size', 1024) if caching_config.get('enabled', True) else 0
+        self._cache = OrderedDict()
         
         if not all([self.url, self.model_name, self.dimension]):
             raise ValueError("Missing required embedding configuration")
@@ -38,8 +49,8 @@ class EmbeddingClient:
         )
         adapter = HTTPAdapter(
             max_retries=retries,
-            pool_connections=10,
-            pool_maxsize=10
+            pool_connections=1,
+            pool_maxsize=embedding_config.get('pool_size', 32)
         )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
@@ -58,14 +69,21 @@ class EmbeddingClient:
         text: str,
         input_type: str = "passage",
         retry_attempts: int = 2
-    ) -> Optional[List[float]]:
-        """Get embedding for a single text input."""
+    ) -> Optional[np.ndarray]:
+        """Get embedding for a single text input as a contiguous float32 vector."""
         if not text:
             return None
 
+        text = text.strip()
+        cache_key = (self.model_name, input_type, text)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
         # Prepare request data
         payload = {
-            "input": [text.strip()],
+            "input": [text],
             "model": self.model_name,
             "input_type": input_type,
             "truncate": self.truncate
@@ -76,17 +94,18 @@ class EmbeddingClient:
             response = self.session.post(
                 self.url,
                 headers=self.headers,
-                json=payload,
+                data=orjson.dumps(payload) if orjson else json.dumps(payload),
                 timeout=self.timeout
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content) if orjson else response.json()
                 embeddings = result.get("data", [])
                 if embeddings:
                     embedding = embeddings[0].get("embedding", [])
                     if embedding and len(embedding) == self.dimension:
-                        logger.info(f"Successfully generated embedding of dimension {self.dimension}")
+                        embedding = np.asarray(embedding, dtype=np.float32)
+                        self._remember(cache_key, embedding)
                         return embedding
             
             logger.error(f"Failed to get embedding. Status: {response.status_code}")
@@ -96,9 +115,19 @@ class EmbeddingClient:
             logger.error(f"Embedding request failed: {str(e)}")
             return None
 
-    def validate_embedding_dimension(self, embedding: List[float]) -> bool:
+    def _remember(self, cache_key: tuple, embedding: np.ndarray):
+        """Cache an embedding, evicting the least recently used entry when full."""
+        if self.cache_size <= 0:
+            return
+        # Cached vectors are shared between callers, so keep them read-only
+        embedding.flags.writeable = False
+        self._cache[cache_key] = embedding
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def validate_embedding_dimension(self, embedding: Union[np.ndarray, List[float]]) -> bool:
         """Validate the dimension of returned embedding."""
-        return isinstance(embedding, list) and len(embedding) == self.dimension
+        return isinstance(embedding, (np.ndarray, list)) and len(embedding) == self.dimension
 
 # Create a global instance
 try:
@@ -84,6 +84,10 @@ class MilvusClient:
     def connect(self, retries=3, delay=2):
         """Establish connection to Milvus with retry logic."""
         try:
+            # Reuse the process-wide connection if it is already open
+            if connections.has_connection(self.alias):
+                return True
+
             # Setup database first
             if not self.setup_database():
                 raise Exception("Database setup failed")
@@ -98,7 +102,9 @@ class MilvusClient:
                         user=self.config.MILVUS_USER,
                         password=self.config.MILVUS_PASSWORD,
                         secure=self.config.MILVUS_TLS_ENABLED,
-                        db_name=self.database
+                        db_name=self.database,
+                        # Reconnect automatically when the gRPC channel drops to idle, so a later search does not fail
+                        keep_alive=True
                     )
                     logger.info(f"Successfully connected to Milvus {self.database} database")
                     return True
@@ -189,7 +195,7 @@ class MilvusClient:
                     return None
                 self.collection = Collection(self.collection_name)
             
-            if not self.collection.is_empty:
+            if not self.collection.is_empty and utility.load_state(self.collection_name).name != "Loaded":
                 self.collection.load()
                 logger.info(f"Collection '{self.collection_name}' loaded for querying")
             
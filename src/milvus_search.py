@@ -1,9 +1,12 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 import time
 import numpy as np
 from pymilvus import Collection, AnnSearchRequest, RRFRanker, WeightedRanker
 
 class MilvusSearchTester:
+    DEFAULT_FIELDS = ("arxiv_url_link", "abstract", "year", "category")
+    TEXT_FIELDS = ("arxiv_url_link", "abstract", "technical_terms", "key_points")
+
     def __init__(self, collection: Collection):
         """Initialize the search tester with a Milvus collection."""
         self.collection = collection
@@ -13,7 +16,7 @@ class MilvusSearchTester:
         self, 
         query_vector: np.ndarray,
         limit: int = 10,
-        output_fields: List[str] = ["arxiv_url_link", "abstract", "year", "category"]
+        output_fields: Sequence[str] = DEFAULT_FIELDS
     ) -> List[Dict]:
         """
         Perform basic vector similarity search.
@@ -35,13 +38,13 @@ class MilvusSearchTester:
             anns_field="embedding",
             param=search_params,
             limit=limit,
-            output_fields=output_fields
+            output_fields=list(output_fields)
         )
         
         end_time = time.time()
         print(self.search_latency_fmt.format(end_time - start_time))
         
-        return self._format_results(results[0])
+        return self._format_results(results[0], output_fields)
 
     def hybrid_category_search(
         self,
@@ -49,7 +52,7 @@ class MilvusSearchTester:
         category: str,
         year_range: Optional[tuple] = None,
         limit: int = 10,
-        output_fields: List[str] = ["arxiv_url_link", "abstract", "year", "category"]
+        output_fields: Sequence[str] = DEFAULT_FIELDS
     ) -> List[Dict]:
         """
         Perform hybrid search combining vector similarity with category and year filtering.
@@ -79,20 +82,20 @@ class MilvusSearchTester:
             param=search_params,
             expr=expr,
             limit=limit,
-            output_fields=output_fields
+            output_fields=list(output_fields)
         )
         
         end_time = time.time()
         print(self.search_latency_fmt.format(end_time - start_time))
         
-        return self._format_results(results[0])
+        return self._format_results(results[0], output_fields)
 
     def multi_vector_search(
         self,
         query_vectors: Dict[str, np.ndarray],
         weights: Optional[List[float]] = None,
         limit: int = 10,
-        output_fields: List[str] = ["arxiv_url_link", "abstract", "year", "category"]
+        output_fields: Sequence[str] = DEFAULT_FIELDS
     ) -> List[Dict]:
         """
         Perform multi-vector search using multiple embeddings with optional weights.
@@ -122,20 +125,20 @@ class MilvusSearchTester:
             search_reqs,
             ranker,
             limit=limit,
-            output_fields=output_fields
+            output_fields=list(output_fields)
         )
         
         end_time = time.time()
         print(self.search_latency_fmt.format(end_time - start_time))
         
-        return self._format_results(results[0])
+        return self._format_results(results[0], output_fields)
 
     def text_enhanced_search(
         self,
         query_text: str,
         technical_terms: Optional[List[str]] = None,
         limit: int = 10,
-        output_fields: List[str] = ["arxiv_url_link", "abstract", "technical_terms", "key_points"]
+        output_fields: Sequence[str] = TEXT_FIELDS
     ) -> List[Dict]:
         """
         Perform text-enhanced search combining BM25 with filters for technical terms.
@@ -165,22 +168,22 @@ class MilvusSearchTester:
             param=search_params,
             expr=expr,
             limit=limit,
-            output_fields=output_fields
+            output_fields=list(output_fields)
         )
         
         end_time = time.time()
         print(self.search_latency_fmt.format(end_time - start_time))
         
-        return self._format_results(results[0])
+        return self._format_results(results[0], output_fields)
 
-    def _format_results(self, results) -> List[Dict]:
+    def _format_results(self, results, output_fields: Sequence[str]) -> List[Dict]:
         """Format search results into a clean dictionary format."""
         formatted_results = []
         for hit in results:
-            result = {
-                "score": hit.score,
-                **hit.fields
-            }
+            fields = hit.fields
+            result = {"score": hit.score}
+            for field in output_fields:
+                result[field] = fields.get(field, "")
             formatted_results.append(result)
         return formatted_results
 
@@ -191,7 +194,7 @@ def run_search_tests(collection_name: str = "arxiv_documents"):
     
     print("\n=== Testing Basic Vector Search ===")
     # Generate a random query vector for testing
-    query_vector = np.random.rand(4096)  # Match your embedding dimension
+    query_vector = np.random.rand(4096).astype(np.float32)  # Match your embedding dimension
     results = tester.basic_vector_search(query_vector)
     print(f"Found {len(results)} results")
     for i, result in enumerate(results[:3], 1):
@@ -1,6 +1,10 @@
 # src/models/model.py
 
 import json
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib parser
+    orjson = None
 from typing import Optional, Dict, Any, List
 import requests
 from requests.adapters import HTTPAdapter
@@ -85,11 +89,11 @@ class ModelInterface:
             response = self.session.post(
                 self.ENDPOINT_URL,
                 headers={"Content-Type": "application/json", "Accept": "application/json"},
-                json=data,
+                data=orjson.dumps(data) if orjson else json.dumps(data),
                 timeout=120
             )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content) if orjson else response.json()
             
         except requests.exceptions.HTTPError as e:
             logger.error(f"HTTP Error during model interaction: {e}")
@@ -268,7 +268,8 @@ def create_rag_engine(
         # Create components
         retriever = create_retriever(
             retriever_type=full_config.get('retriever_type', 'milvus'),
-            search_params=full_config.get('search_params')
+            search_params=full_config.get('search_params'),
+            output_fields=full_config.get('output_fields')
         )
         
         formatter = create_formatter(
@@ -1,5 +1,6 @@
 from typing import List, Dict, Any
 from abc import ABC, abstractmethod
+from dataclasses import asdict
 import textwrap
 
 from src.logs.logger import setup_logger
@@ -111,7 +112,7 @@ class AcademicFormatter(BaseFormatter):
             context_parts.append(formatted_source)
             total_length += source_length
         
-        logger.debug(f"Formatted context with {len(context_parts)} sources, {total_length} chars")
+        logger.debug("Formatted context with %d sources, %d chars", len(context_parts), total_length)
         bibliography = self.append_bibliography(sources[:len(context_parts)])
         return "\n\n".join(context_parts) + "\n\n" + bibliography
 
@@ -184,7 +185,7 @@ class CustomFormatter(BaseFormatter):
         formatted_sources = [
             self.source_template.format(
                 index=i,
-                **source.__dict__
+                **asdict(source)
             )
             for i, source in enumerate(sources, 1)
         ]
@@ -24,7 +24,8 @@ class MilvusRetriever(BaseRetriever):
         self,
         embedding_client=embedding_client,
         milvus_client=milvus_client,
-        search_params: Optional[Dict[str, Any]] = None
+        search_params: Optional[Dict[str, Any]] = None,
+        output_fields: Optional[List[str]] = None
     ):
         """Initialize the retriever with clients and search parameters.
         
@@ -32,6 +33,7 @@ class MilvusRetriever(BaseRetriever):
             embedding_client: Client for generating embeddings
             milvus_client: Client for Milvus operations
             search_params: Optional search parameters override
+            output_fields: Optional subset of fields to fetch per hit
         """
         self.embedding_client = embedding_client
         self.milvus_client = milvus_client
@@ -42,8 +44,9 @@ class MilvusRetriever(BaseRetriever):
             "params": {"search_width": 128},
         }
         
-        # Fields to retrieve from Milvus
-        self.output_fields = [
+        # Fields to retrieve from Milvus; fields left out fall back to
+        # ArxivSource defaults, so formatters that render less can fetch less
+        self.output_fields = output_fields or [
             "doc_id", "arxiv_url_link", "source_file", "year",
             "category", "abstract", "text", "summary", "key_points",
             "technical_terms", "relationships", "timestamp"
@@ -94,12 +97,12 @@ class MilvusRetriever(BaseRetriever):
         """
         try:
             # Generate query embedding
-            start_time = time.time()
+            start_time = time.perf_counter()
             query_embedding = self.embedding_client.get_embedding(query, input_type="query")
-            if not query_embedding:
+            if query_embedding is None:
                 raise ValueError("Failed to generate query embedding")
             
-            logger.debug(f"Generated embedding in {time.time() - start_time:.2f}s")
+            logger.debug("Generated embedding in %.2fs", time.perf_counter() - start_time)
 
             # Connect to Milvus
             if not self.milvus_client.connect():
@@ -110,20 +113,17 @@ class MilvusRetriever(BaseRetriever):
             if not collection:
                 raise ValueError("Failed to get collection")
 
-            # Prepare search parameters
-            search_params = {
-                "data": [query_embedding],
-                "anns_field": "embedding",
-                "param": self.search_params,
-                "limit": top_k,
-                "output_fields": self.output_fields
-            }
-
-            # Execute search
-            logger.debug(f"Executing search with params: {search_params}")
-            search_start = time.time()
-            results = collection.search(**search_params)
-            logger.debug(f"Search completed in {time.time() - search_start:.2f}s")
+            # Execute search with the parameters and fields fixed at construction
+            logger.debug("Executing search with params: %s, limit: %d", self.search_params, top_k)
+            search_start = time.perf_counter()
+            results = collection.search(
+                data=[query_embedding],
+                anns_field="embedding",
+                param=self.search_params,
+                limit=top_k,
+                output_fields=self.output_fields
+            )
+            logger.debug("Search completed in %.2fs", time.perf_counter() - search_start)
 
             if not results or not results[0]:
                 logger.warning("No search results found")
@@ -133,37 +133,34 @@ class MilvusRetriever(BaseRetriever):
             sources = []
             for hit in results[0]:
                 try:
+                    fields = hit.fields
                     source = ArxivSource(
-                        doc_id=getattr(hit, 'doc_id', -1),
-                        arxiv_url_link=getattr(hit, 'arxiv_url_link', ''),
-                        source_file=getattr(hit, 'source_file', ''),
-                        year=getattr(hit, 'year', 0),
-                        category=getattr(hit, 'category', ''),
-                        abstract=getattr(hit, 'abstract', ''),
-                        text=getattr(hit, 'text', ''),
-                        summary=getattr(hit, 'summary', ''),
-                        key_points=getattr(hit, 'key_points', ''),
-                        technical_terms=getattr(hit, 'technical_terms', ''),
-                        relationships=getattr(hit, 'relationships', ''),
-                        timestamp=getattr(hit, 'timestamp', 0),
-                        score=float(hit.distance)
+                        doc_id=fields.get('doc_id', -1),
+                        arxiv_url_link=fields.get('arxiv_url_link', ''),
+                        source_file=fields.get('source_file', ''),
+                        year=fields.get('year', 0),
+                        category=fields.get('category', ''),
+                        abstract=fields.get('abstract', ''),
+                        text=fields.get('text', ''),
+                        summary=fields.get('summary', ''),
+                        key_points=fields.get('key_points', ''),
+                        technical_terms=fields.get('technical_terms', ''),
+                        relationships=fields.get('relationships', ''),
+                        timestamp=fields.get('timestamp', 0),
+                        score=hit.distance
                     )
                     sources.append(source)
-                    logger.debug(f"Processed hit for doc_id: {source.doc_id}, score: {source.score:.4f}")
+                    logger.debug("Processed hit for doc_id: %s, score: %.4f", source.doc_id, source.score)
                 except Exception as e:
                     logger.error(f"Error processing search result: {str(e)}")
                     continue
 
-            logger.info(f"Retrieved {len(sources)} documents for query: {query}")
+            logger.info("Retrieved %d documents for query: %s", len(sources), query)
             return sources
 
         except Exception as e:
             logger.error(f"Retrieval error: {str(e)}")
             raise
-        finally:
-            if self.milvus_client:
-                self.milvus_client.release_collection()
-                self.milvus_client.disconnect()
 
     def estimate_search_quality(self, sources: List[ArxivSource]) -> Dict[str, float]:
         """Estimate search quality metrics.
@@ -237,13 +234,14 @@ class HybridRetriever(BaseRetriever):
 def create_retriever(
     retriever_type: str = "milvus",
     search_params: Optional[Dict[str, Any]] = None,
-    reranker: Optional[Any] = None
+    reranker: Optional[Any] = None,
+    output_fields: Optional[List[str]] = None
 ) -> BaseRetriever:
     """Create a retriever instance based on specified type."""
     if retriever_type == "milvus":
-        return MilvusRetriever(search_params=search_params)
+        return MilvusRetriever(search_params=search_params, output_fields=output_fields)
     elif retriever_type == "hybrid":
-        vector_retriever = MilvusRetriever(search_params=search_params)
+        vector_retriever = MilvusRetriever(search_params=search_params, output_fields=output_fields)
         return HybridRetriever(vector_retriever, reranker)
     else:
         raise ValueError(f"Unknown retriever type: {retriever_type}")
\ No newline at end of file
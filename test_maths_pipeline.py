@@ -0,0 +1,36 @@
+"""
+Regression tests for the math solver pipeline.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+_spec = importlib.util.spec_from_file_location(
+    "maths_pipeline", Path(__file__).parent / "pipelines" / "maths_pipeline.py"
+)
+maths_pipeline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(maths_pipeline)
+
+
+@pytest.fixture(params=[True, False], ids=["steps", "folded"])
+def pipeline(request):
+    pipeline = maths_pipeline.Pipeline()
+    pipeline.valves = pipeline.Valves(SHOW_STEPS=request.param)
+    return pipeline
+
+
+@pytest.mark.parametrize("expression", ["0^-1", "0^-2", "0.0^-1", "(1-1)^-3"])
+def test_zero_to_negative_power_is_division_by_zero(pipeline, expression):
+    assert pipeline.pipe(expression, "", [], {}) == "Error: Calculation error: Division by zero"
+
+
+def test_division_by_zero(pipeline):
+    assert pipeline.pipe("1/0", "", [], {}) == "Error: Calculation error: Division by zero"
+
+
+def test_negative_power(pipeline):
+    assert pipeline.pipe("2^-2", "", [], {}).splitlines()[1] == "Result: 0.25"
@@ -3,9 +3,11 @@ Complete Milvus Search Implementation for arXiv papers with multiple search stra
 """
 
 import numpy as np
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterable, Iterator
+import itertools
 import time
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 from rich.prompt import Prompt, IntPrompt
 import textwrap
@@ -26,12 +28,12 @@ class MilvusSearchTester:
         expr: Optional[str] = None,
         limit: int = 10,
         output_fields: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
-        """Base vector search method with optional filtering."""
+    ) -> Iterator[Dict[str, Any]]:
+        """Base vector search method with optional filtering; hits are converted lazily."""
         if output_fields is None:
             output_fields = ["arxiv_url_link", "summary", "year", "category"]
             
-        start_time = time.time()
+        start_time = time.perf_counter()
         search_params = {
             "metric_type": "L2",
             "params": {"nprobe": 16}
@@ -46,21 +48,21 @@ class MilvusSearchTester:
             output_fields=output_fields
         )
         
-        print(f"Search latency = {time.time() - start_time:.4f}s")
-        return [
+        print(f"Search latency = {time.perf_counter() - start_time:.4f}s")
+        return (
             {
                 "score": hit.distance,
                 **hit.fields
             }
             for hit in results[0]
-        ]
+        )
 
     def basic_vector_search(
         self,
         query_vector: np.ndarray,
         limit: int = 10,
         output_fields: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Perform basic vector similarity search."""
         return self.vector_search(
             query_vector=query_vector,
@@ -75,7 +77,7 @@ class MilvusSearchTester:
         year_range: Optional[tuple] = None,
         limit: int = 10,
         output_fields: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Perform hybrid search with category and year filtering."""
         expr = f'category == "{category}"'
         if year_range:
@@ -94,7 +96,7 @@ class MilvusSearchTester:
         technical_terms: Optional[List[str]] = None,
         limit: int = 10,
         output_fields: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """Perform vector search with technical terms filtering."""
         if output_fields is None:
             output_fields = ["arxiv_url_link", "summary", "year", "category", "technical_terms"]
@@ -143,11 +145,14 @@ class SearchDemo:
         embedding = self.embedding_client.get_embedding(query, input_type="passage")
         if embedding is None:
             raise ValueError("Failed to generate embedding for query")
-        return np.array(embedding)
+        # Already float32 from the client, so this reuses the buffer instead of copying
+        return np.asarray(embedding, dtype=np.float32)
 
-    def print_results(self, results: List[Dict[str, Any]], title: str):
-        """Display search results in a formatted table."""
-        if not results:
+    def print_results(self, results: Iterable[Dict[str, Any]], title: str):
+        """Display search results in a formatted table, rendering rows as they arrive."""
+        results = iter(results)
+        first = next(results, None)
+        if first is None:
             console.print("[yellow]No results found.[/yellow]")
             return
 
@@ -158,17 +163,16 @@ class SearchDemo:
         table.add_column("Summary", style="white", width=60, overflow="fold")
         table.add_column("URL", style="blue", width=40)
 
-        for result in results:
-            summary = textwrap.shorten(result.get('summary', ''), width=200, placeholder="...")
-            table.add_row(
-                f"{result.get('score', 0.0):.4f}",
-                str(result.get('year', 'N/A')),
-                result.get('category', 'N/A'),
-                summary,
-                result.get('arxiv_url_link', 'N/A')
-            )
-
-        console.print(table)
+        with Live(table, console=console, refresh_per_second=8):
+            for result in itertools.chain((first,), results):
+                summary = textwrap.shorten(result.get('summary', ''), width=200, placeholder="...")
+                table.add_row(
+                    f"{result.get('score', 0.0):.4f}",
+                    str(result.get('year', 'N/A')),
+                    result.get('category', 'N/A'),
+                    summary,
+                    result.get('arxiv_url_link', 'N/A')
+                )
 
     def semantic_search(self):
         """Perform semantic search using text query."""